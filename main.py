@@ -1,9 +1,16 @@
 import os
 import asyncio
+import contextlib
+import functools
 import json
+import logging
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import shutil
-from typing import List, Tuple
+import threading
+import time
+from typing import List, NamedTuple, Optional, Tuple
 
 from fastapi import FastAPI, BackgroundTasks, HTTPException
 from fastapi.responses import FileResponse
@@ -11,7 +18,16 @@ from pydantic import BaseModel
 import yt_dlp
 import soundfile as sf
 import numpy as np
-import ffmpeg
+
+try:
+    import numpy_rms  # Optional C/SIMD RMS kernel
+except ImportError:
+    numpy_rms = None
+
+try:
+    from numba import njit, prange  # Optional JIT for the mix kernel
+except ImportError:
+    njit = None
 
 # --- Stem + audio utilities ---
 EXPECTED_STEM_ORDER = ["vocals", "drums", "bass", "guitar", "piano", "other"]
@@ -24,7 +40,22 @@ CHANNEL_LAYOUT_MAP = {
     6: "6.0",
 }
 RMS_SILENCE_THRESHOLD = 1e-6
+RMS_BLOCK_FRAMES = 1 << 17  # ~1 MB per block for stereo float32
+# Sized so the per-chunk stem tile stays cache resident (~768 KB for 6 stereo stems)
+MIX_CHUNK_FRAMES = 1 << 14
+MAX_UNROLLED_STEMS = 8
+MAX_MERGE_WORKERS = 8
+MULTICHANNEL_MEMO_SIZE = 64
+DEFAULT_DEMUCS_MODEL = "htdemucs_6s"
+PROGRESS_UPDATE_INTERVAL = 0.2  # seconds between download progress writes
 STEM_INDEX_FILENAME = "stem_index.json"
+STEM_CACHE_DIRNAME = ".stem_cache"
+
+
+class StemInfo(NamedTuple):
+    channels: int
+    samplerate: int
+    frames: int
 
 # --- Configuration ---
 DOWNLOADS_DIR = "./downloads"
@@ -32,16 +63,109 @@ SEPARATED_DIR = "./separated"
 MIXES_DIR = "./mixes"
 REMUXED_DIR = "./remuxed"
 
-os.makedirs(DOWNLOADS_DIR, exist_ok=True)
-os.makedirs(SEPARATED_DIR, exist_ok=True)
-os.makedirs(MIXES_DIR, exist_ok=True)
-os.makedirs(REMUXED_DIR, exist_ok=True)
+DATA_DIRS = (DOWNLOADS_DIR, SEPARATED_DIR, MIXES_DIR, REMUXED_DIR)
+
+# A few ffmpeg processes with several threads each beat one process per core
+FFMPEG_THREADS = max(1, (os.cpu_count() or 2) // 2)
+MAX_CONCURRENT_ENCODES = max(1, (os.cpu_count() or 2) // FFMPEG_THREADS)
+MAX_CONCURRENT_DOWNLOADS = 4
+# Merges and mix exports are CPU/IO heavy; leave cores for ffmpeg and the API
+MAX_CONCURRENT_MIXES = max(1, (os.cpu_count() or 2) // 2)
+# Opt in with STAGESPLIT_PRELOAD_DEMUCS=1 to load the default model at startup
+PRELOAD_DEMUCS_MODEL = os.environ.get("STAGESPLIT_PRELOAD_DEMUCS") == "1"
+
+for directory in DATA_DIRS:
+    os.makedirs(directory, exist_ok=True)
+
+# Resolved once; /files only serves regular files that really live under these
+SERVED_ROOTS = tuple(os.path.realpath(directory) + os.sep for directory in DATA_DIRS)
+
+# Options shared by every download; do_download only adds its progress hook
+YDL_BASE_OPTS = {
+    # Prefer streams that mp4 holds natively so the merge is a stream copy
+    'format': 'bv*[ext=mp4]+ba[ext=m4a]/b[ext=mp4]/bv*+ba/b',
+    'outtmpl': os.path.join(DOWNLOADS_DIR, '%(title)s.%(ext)s'),
+    'merge_output_format': 'mp4',
+    # Fetch HLS/DASH fragments in parallel
+    'concurrent_fragment_downloads': 8,
+    # A single non-mp4 fallback file is stream-copied into mp4 rather than
+    # re-encoded; files that are already mp4 are left untouched
+    'postprocessors': [{
+        'key': 'FFmpegVideoRemuxer',
+        'preferedformat': 'mp4',
+    }],
+}
+
+logger = logging.getLogger(__name__)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load in the background so startup never waits on model weights
+    preload = asyncio.create_task(_preload_demucs_model()) if PRELOAD_DEMUCS_MODEL else None
+    yield
+    if preload is not None:
+        preload.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+class TaskStore:
+    """Thread-safe in-memory task records.
+
+    Progress hooks write from worker threads while the event loop reads, so every
+    access goes through one lock and readers only ever see copies.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks = {}
+
+    def set(self, task_id: str, fields: dict):
+        """Replace the whole record for task_id."""
+        with self._lock:
+            self._tasks[task_id] = dict(fields)
+
+    def update(self, task_id: str, fields: dict):
+        """Merge fields into the record for task_id, creating it if needed."""
+        with self._lock:
+            self._tasks.setdefault(task_id, {}).update(fields)
+
+    def get(self, task_id: str):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return dict(task) if task is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._tasks.clear()
 
-app = FastAPI()
 
 # In-memory storage for task progress and results (for simplicity)
 # In a production app, consider a database or a more robust caching mechanism
-tasks = {}
+tasks = TaskStore()
+
+# Bounds concurrent ffmpeg encodes (auto-remux and mix export)
+ffmpeg_slots = asyncio.Semaphore(MAX_CONCURRENT_ENCODES)
+
+# Bounds concurrent yt-dlp downloads
+download_slots = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+
+# One Demucs job at a time; concurrent models exhaust GPU memory and thrash the CPU
+separation_slots = asyncio.Semaphore(1)
+
+# Bounds concurrent multichannel builds and mix exports
+mix_slots = asyncio.Semaphore(MAX_CONCURRENT_MIXES)
+
+# LRU of ensure_multichannel_stem results keyed by stem (path, mtime, size)
+_multichannel_memo = OrderedDict()
+# task_id -> time.monotonic() of the last download progress write
+_progress_last_update = {}
+
+# Demucs models are loaded lazily on first use and reused across separations
+demucs_models = {}
+_demucs_lock = threading.Lock()
 
 # --- Data Models ---
 class DownloadRequest(BaseModel):
@@ -50,7 +174,7 @@ class DownloadRequest(BaseModel):
 class SeparateRequest(BaseModel):
     task_id: str
     video_path: str
-    model: str = "htdemucs_6s" # Default to 6-stem model
+    model: str = DEFAULT_DEMUCS_MODEL # Default to 6-stem model
 
 class MergeRequest(BaseModel):
     task_id: str
@@ -82,19 +206,75 @@ async def run_command(command: list, task_id: str, message_prefix: str):
     stdout, stderr = await process.communicate()
 
     if process.returncode != 0:
-        tasks[task_id] = {"status": "failed", "message": f"{message_prefix} failed: {stderr.decode().strip()}"}
+        tasks.set(task_id, {"status": "failed", "message": f"{message_prefix} failed: {stderr.decode().strip()}"})
         raise RuntimeError(f"{message_prefix} failed: {stderr.decode().strip()}")
     
-    tasks[task_id]["message"] = f"{message_prefix} completed."
+    tasks.update(task_id, {"message": f"{message_prefix} completed."})
+    return stdout.decode().strip()
+
+
+def _next_chunk_bytes(chunks) -> Optional[bytes]:
+    # tobytes() copies, so the producer may reuse its buffer straight away
+    chunk = next(chunks, None)
+    return None if chunk is None else chunk.tobytes()
+
+
+async def run_command_with_input(command: list, chunks, task_id: str, message_prefix: str):
+    """Like run_command, but streams each array from chunks into the process's stdin."""
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+    # Drain the output pipes concurrently so ffmpeg never blocks on a full pipe
+    stdout_task = asyncio.create_task(process.stdout.read())
+    stderr_task = asyncio.create_task(process.stderr.read())
+    try:
+        try:
+            while True:
+                # Producing a chunk may be CPU/IO heavy, so it runs on a worker thread
+                data = await asyncio.to_thread(_next_chunk_bytes, chunks)
+                if data is None:
+                    break
+                process.stdin.write(data)
+                await process.stdin.drain()
+            process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            # The process exited early; its return code and stderr explain why
+            pass
+
+        stdout = await stdout_task
+        stderr = await stderr_task
+        await process.wait()
+    except BaseException:
+        # A failing producer, a write error or cancellation must not leave the
+        # process running after the caller has released its encode slot
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        stdout_task.cancel()
+        stderr_task.cancel()
+        await process.wait()
+        raise
+
+    if process.returncode != 0:
+        tasks.set(task_id, {"status": "failed", "message": f"{message_prefix} failed: {stderr.decode().strip()}"})
+        raise RuntimeError(f"{message_prefix} failed: {stderr.decode().strip()}")
+
+    tasks.update(task_id, {"message": f"{message_prefix} completed."})
     return stdout.decode().strip()
 
 
 def _discover_stems(separated_dir: str) -> List[Tuple[str, str]]:
     available = {}
-    for entry in os.listdir(separated_dir):
-        if entry.endswith('.wav') and entry != 'multichannel_stems.wav':
-            stem_name = os.path.splitext(entry)[0]
-            available[stem_name] = os.path.join(separated_dir, entry)
+    with os.scandir(separated_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith('.wav') and entry.name != 'multichannel_stems.wav' and entry.is_file():
+                stem_name = os.path.splitext(entry.name)[0]
+                available[stem_name] = entry.path
 
     ordered = []
     for stem_name in EXPECTED_STEM_ORDER:
@@ -112,20 +292,297 @@ def _determine_layout(channel_count: int) -> str:
     return CHANNEL_LAYOUT_MAP.get(channel_count, f"{channel_count}.0")
 
 
-def _compute_rms(path: str) -> float:
+async def _probe_audio_layout(task_id: str, media_path: str) -> str:
+    """Return the channel layout ffprobe reports for the first audio stream of media_path."""
+    probe_output = await run_command([
+        'ffprobe', '-v', 'error', '-select_streams', 'a:0',
+        '-show_entries', 'stream=channel_layout', '-of', 'json',
+        media_path
+    ], task_id, "Verifying channel layout")
+    try:
+        return json.loads(probe_output)['streams'][0].get('channel_layout') or 'unknown'
+    except (json.JSONDecodeError, KeyError, IndexError) as exc:
+        raise RuntimeError(f"Unable to parse ffprobe output for {media_path}: {exc}")
+
+
+def _sum_of_squares(samples: np.ndarray) -> float:
+    flat = samples.ravel()
+    if numpy_rms is not None:
+        rms = float(numpy_rms.rms(flat)[0])
+        return rms * rms * flat.size
+    # A BLAS dot product fuses square + sum without materialising a squared temp array
+    return float(flat @ flat)
+
+
+def _rms_of(sound_file: sf.SoundFile) -> float:
     total = 0.0
     sample_count = 0
-    with sf.SoundFile(path) as f:
-        for block in f.blocks(blocksize=65536, dtype='float32'):
-            if block.size == 0:
-                continue
-            total += float(np.sum(block ** 2))
-            sample_count += block.size
+    buffer = np.empty((RMS_BLOCK_FRAMES, sound_file.channels), dtype=np.float32)
+    while True:
+        block = sound_file.read(dtype='float32', always_2d=True, out=buffer)
+        if block.size == 0:
+            break
+        total += _sum_of_squares(block)
+        sample_count += block.size
     if sample_count == 0:
         return 0.0
     return float(np.sqrt(total / sample_count))
 
 
+def _compute_rms(path: str) -> float:
+    with sf.SoundFile(path) as f:
+        return _rms_of(f)
+
+
+def _is_silent(sound_file: sf.SoundFile, threshold: float = RMS_SILENCE_THRESHOLD) -> bool:
+    """Return whether the overall RMS is below threshold, stopping once it provably is not."""
+    # Sum of squares the whole file needs for its RMS to reach the threshold
+    limit = threshold * threshold * sound_file.frames * sound_file.channels
+    total = 0.0
+    buffer = np.empty((RMS_BLOCK_FRAMES, sound_file.channels), dtype=np.float32)
+    while True:
+        block = sound_file.read(dtype='float32', always_2d=True, out=buffer)
+        if block.size == 0:
+            break
+        total += _sum_of_squares(block)
+        if total >= limit:
+            return False
+    return True
+
+
+def _probe_stem(path: str) -> Tuple[bool, StemInfo]:
+    """Check silence and read header info for a stem with a single open of the file."""
+    with sf.SoundFile(path) as f:
+        info = StemInfo(channels=f.channels, samplerate=f.samplerate, frames=f.frames)
+        return _is_silent(f), info
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _mix_kernel(out, stem_chunks, gains):
+        """out[t, c] = sum_s stem_chunks[s, t, c] * gains[s]; returns max |out| from the same pass."""
+        peak = 0.0
+        for t in prange(out.shape[0]):
+            for c in range(out.shape[1]):
+                acc = np.float32(0.0)
+                for s in range(gains.shape[0]):
+                    acc += stem_chunks[s, t, c] * gains[s]
+                out[t, c] = acc
+                peak = max(peak, abs(acc))
+        return peak
+else:
+    def _mix_kernel(out, stem_chunks, gains):
+        """NumPy fallback: one BLAS GEMV, gains (S,) @ stem_chunks (S, frames*channels)."""
+        np.matmul(gains, stem_chunks.reshape(gains.shape[0], out.size), out=out.reshape(-1))
+        if out.size == 0:
+            return 0.0
+        return max(float(out.max()), float(-out.min()))
+
+
+if njit is not None:
+    # Mixing runs on worker threads. Start numba's thread pool from the main thread
+    # first: if a worker thread initialises the TBB layer, interpreter exit can hang.
+    _mix_kernel(np.zeros((16, 1), dtype=np.float32), np.zeros((1, 16, 1), dtype=np.float32), np.ones(1, dtype=np.float32))
+
+
+@functools.lru_cache(maxsize=None)
+def _make_unrolled_mix_kernel(n_stems: int, n_channels: int):
+    """Generate and JIT a mix kernel with the stem and channel loops fully unrolled.
+
+    Like _mix_kernel it also returns the peak |sample|, reduced across the prange.
+    """
+    lines = ["def kernel(out, stem_chunks, gains):"]
+    lines += [f"    g{s} = gains[{s}]" for s in range(n_stems)]
+    lines.append("    peak = 0.0")
+    lines.append("    for t in prange(out.shape[0]):")
+    for c in range(n_channels):
+        terms = " + ".join(f"stem_chunks[{s}, t, {c}] * g{s}" for s in range(n_stems)) or "0.0"
+        lines.append(f"        s{c} = {terms}")
+        lines.append(f"        out[t, {c}] = s{c}")
+    # Numba only recognises the two-argument max(peak, x) form as a prange reduction
+    lines.append("        frame_peak = abs(s0)")
+    lines += [f"        frame_peak = max(frame_peak, abs(s{c}))" for c in range(1, n_channels)]
+    lines.append("        peak = max(peak, frame_peak)")
+    lines.append("    return peak")
+    namespace = {'prange': prange}
+    exec("\n".join(lines), namespace)
+    return njit(parallel=True, fastmath=True)(namespace['kernel'])
+
+
+def _select_mix_kernel(n_stems: int, n_channels: int):
+    # htdemucs_6s gives 6 stereo stems, so the unrolled table stays tiny
+    if njit is not None and n_stems <= MAX_UNROLLED_STEMS and n_channels <= 2:
+        return _make_unrolled_mix_kernel(n_stems, n_channels)
+    return _mix_kernel
+
+
+def _load_stem_samples(stem_path: str, samplerate: Optional[int] = None) -> Tuple[np.ndarray, int]:
+    """Return a read-only float32 memmap of a stem plus its sample rate.
+
+    The stem is decoded once into a .npy cache next to it; later mixes map the
+    cache directly, so repeated exports skip decoding and share the page cache.
+    A known samplerate (e.g. from the stem index) spares the header read on a cache hit.
+    """
+    cache_dir = os.path.join(os.path.dirname(stem_path), STEM_CACHE_DIRNAME)
+    stem_name = os.path.splitext(os.path.basename(stem_path))[0]
+    cache_path = os.path.join(cache_dir, f"{stem_name}.npy")
+
+    try:
+        if os.stat(cache_path).st_mtime_ns >= os.stat(stem_path).st_mtime_ns:
+            if samplerate is None:
+                samplerate = sf.info(stem_path).samplerate
+            return np.load(cache_path, mmap_mode='r'), samplerate
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(cache_dir, exist_ok=True)
+    partial_path = os.path.join(cache_dir, f"{stem_name}.{uuid.uuid4().hex}.partial.npy")
+    try:
+        with sf.SoundFile(stem_path) as stem_file:
+            samplerate = stem_file.samplerate
+            cache = np.lib.format.open_memmap(
+                partial_path, mode='w+', dtype=np.float32, shape=(stem_file.frames, stem_file.channels)
+            )
+            frame_cursor = 0
+            while frame_cursor < stem_file.frames:
+                block_len = min(RMS_BLOCK_FRAMES, stem_file.frames - frame_cursor)
+                block = stem_file.read(dtype='float32', always_2d=True, out=cache[frame_cursor:frame_cursor + block_len])
+                if block.shape[0] == 0:
+                    break
+                frame_cursor += block.shape[0]
+            cache.flush()
+            del cache
+        os.replace(partial_path, cache_path)
+    except BaseException:
+        # Never leave a half-written cache behind
+        try:
+            os.remove(partial_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return np.load(cache_path, mmap_mode='r'), samplerate
+
+
+def _iter_mixed_chunks_with_peak(sources: List[np.ndarray], gains: np.ndarray, channels: int, max_frames: int):
+    """Yield (chunk, peak) pairs of at most MIX_CHUNK_FRAMES frames.
+
+    Each chunk is a view into a buffer that is reused for the next one; peak is the
+    chunk's max |sample|, computed by the mix kernel in the same pass.
+    """
+    stem_chunks = np.zeros((len(sources), MIX_CHUNK_FRAMES, channels), dtype=np.float32)
+    mixed_chunk = np.empty((MIX_CHUNK_FRAMES, channels), dtype=np.float32)
+    mix_kernel = _select_mix_kernel(len(sources), channels)
+    # Rows of each stem's slot that may still hold samples from an earlier chunk
+    dirty_rows = [0] * len(sources)
+    for start in range(0, max_frames, MIX_CHUNK_FRAMES):
+        chunk_len = min(MIX_CHUNK_FRAMES, max_frames - start)
+        for index, source in enumerate(sources):
+            block = source[start:start + chunk_len]
+            block_len = block.shape[0]
+            stem_chunks[index, :block_len] = block
+            # Stems that ended early contribute silence; the slot started zeroed, so
+            # only stale rows need clearing and a finished stem costs nothing
+            if dirty_rows[index] > block_len:
+                stem_chunks[index, block_len:dirty_rows[index]] = 0.0
+            dirty_rows[index] = block_len
+        out = mixed_chunk[:chunk_len]
+        peak = mix_kernel(out, stem_chunks[:, :chunk_len], gains)
+        yield out, peak
+
+
+def _iter_mixed_chunks(sources: List[np.ndarray], gains: np.ndarray, channels: int, max_frames: int):
+    """Yield mixed chunks only, for streaming to ffmpeg."""
+    for chunk, _ in _iter_mixed_chunks_with_peak(sources, gains, channels, max_frames):
+        yield chunk
+
+
+def _fill_mono_column(multichannel: np.ndarray, column: int, stem_path: str):
+    """Stream a stem into one column of multichannel, averaging its channels to mono."""
+    with sf.SoundFile(stem_path) as stem_file:
+        buffer = np.empty((RMS_BLOCK_FRAMES, stem_file.channels), dtype=np.float32)
+        scale = np.float32(1.0 / stem_file.channels)
+        frame_cursor = 0
+        while True:
+            block = stem_file.read(dtype='float32', always_2d=True, out=buffer)
+            block_len = block.shape[0]
+            if block_len == 0:
+                break
+            target = multichannel[frame_cursor:frame_cursor + block_len, column]
+            if block.shape[1] == 1:
+                target[:] = block[:, 0]
+            else:
+                # Sum then scale in place; no mono temporary per block
+                np.sum(block, axis=1, out=target)
+                target *= scale
+            frame_cursor += block_len
+
+
+def _mix_peak(sources: List[np.ndarray], gains: np.ndarray, channels: int, max_frames: int) -> float:
+    peak = 0.0
+    for _, chunk_peak in _iter_mixed_chunks_with_peak(sources, gains, channels, max_frames):
+        peak = max(peak, float(chunk_peak))
+    return peak
+
+
+def _write_multichannel(multichannel_path: str, stems: List[Tuple[str, str]], stem_infos: dict):
+    """Downmix each stem to mono and interleave them into one multichannel WAV."""
+    samplerate = stem_infos[stems[0][0]].samplerate
+    for stem_name, _ in stems:
+        if stem_infos[stem_name].samplerate != samplerate:
+            raise ValueError(f"Sample rate mismatch for stem {stem_name}")
+
+    # Shorter stems are left zero-padded to the longest one
+    max_frames = max(info.frames for info in stem_infos.values())
+    multichannel = np.zeros((max_frames, len(stems)), dtype=np.float32)
+
+    # Each stem owns one column, so the workers never write the same element; the
+    # libsndfile decodes and NumPy reductions release the GIL and overlap across stems.
+    with ThreadPoolExecutor(max_workers=min(MAX_MERGE_WORKERS, len(stems))) as pool:
+        list(pool.map(
+            functools.partial(_fill_mono_column, multichannel),
+            range(len(stems)),
+            [stem_path for _, stem_path in stems],
+        ))
+
+    # Only the remux (which re-encodes to AAC) reads this file now; the mix maps the
+    # stem caches. 16-bit halves the bytes written and read, so clamp first
+    # rather than let out-of-range samples wrap.
+    np.clip(multichannel, -1.0, 1.0, out=multichannel)
+    sf.write(multichannel_path, multichannel, samplerate, subtype='PCM_16')
+
+
+def _load_fresh_index(multichannel_path: str, index_path: str, stems: List[Tuple[str, str]]):
+    """Return the stem index if multichannel_path is up to date with the stems, else None."""
+    try:
+        built_at = min(os.stat(multichannel_path).st_mtime_ns, os.stat(index_path).st_mtime_ns)
+        if any(os.stat(stem_path).st_mtime_ns > built_at for _, stem_path in stems):
+            return None
+        with open(index_path, 'r', encoding='utf-8') as index_file:
+            index = json.load(index_file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if index.get('order') != [stem for stem, _ in stems] or not index.get('channel_layout'):
+        return None
+    return index
+
+
+def _stems_memo_key(separated_dir: str, stems: List[Tuple[str, str]]) -> tuple:
+    """Key that changes whenever any stem file is replaced or rewritten."""
+    key = [os.path.abspath(separated_dir)]
+    for _, stem_path in stems:
+        stat = os.stat(stem_path)
+        key.append((stem_path, stat.st_mtime_ns, stat.st_size))
+    return tuple(key)
+
+
+def _remember_multichannel(memo_key: tuple, multichannel_path: str, stem_order: List[str], channel_layout: str):
+    _multichannel_memo[memo_key] = (multichannel_path, tuple(stem_order), channel_layout)
+    _multichannel_memo.move_to_end(memo_key)
+    while len(_multichannel_memo) > MULTICHANNEL_MEMO_SIZE:
+        _multichannel_memo.popitem(last=False)
+
+
 async def ensure_multichannel_stem(task_id: str, separated_dir: str):
     """Create (or refresh) multichannel_stems.wav with explicit channel layout and metadata."""
     stems = _discover_stems(separated_dir)
@@ -135,164 +592,179 @@ async def ensure_multichannel_stem(task_id: str, separated_dir: str):
     stem_order = [stem for stem, _ in stems]
     layout = _determine_layout(len(stems))
     multichannel_path = os.path.join(separated_dir, "multichannel_stems.wav")
+    index_path = os.path.join(separated_dir, STEM_INDEX_FILENAME)
 
-    # Verify stems are not silent to catch routing issues early
-    silent_stems = []
-    stem_infos = {}
-    for stem_name, stem_path in stems:
-        rms = _compute_rms(stem_path)
-        if rms < RMS_SILENCE_THRESHOLD:
-            silent_stems.append(stem_name)
-        stem_infos[stem_name] = sf.info(stem_path)
+    # Repeat calls for unchanged stems are answered from memory
+    memo_key = _stems_memo_key(separated_dir, stems)
+    memoized = _multichannel_memo.get(memo_key)
+    if memoized is not None and os.path.exists(memoized[0]) and os.path.exists(index_path):
+        _multichannel_memo.move_to_end(memo_key)
+        return memoized[0], list(memoized[1]), memoized[2]
+
+    # Skip the rebuild when the WAV and index are newer than every stem
+    index = _load_fresh_index(multichannel_path, index_path, stems)
+    if index is not None:
+        _remember_multichannel(memo_key, multichannel_path, index['order'], index['channel_layout'])
+        return multichannel_path, index['order'], index['channel_layout']
+
+    # Verify stems are not silent to catch routing issues early.
+    # Each stem is probed on a worker thread so the reads overlap.
+    async def _probe(stem_name: str, stem_path: str):
+        silent, info = await asyncio.to_thread(_probe_stem, stem_path)
+        return stem_name, silent, info
+
+    results = await asyncio.gather(*[_probe(stem_name, stem_path) for stem_name, stem_path in stems])
+
+    silent_stems = [stem_name for stem_name, silent, _ in results if silent]
+    stem_infos = {stem_name: info for stem_name, _, info in results}
     if silent_stems:
         raise RuntimeError(f"The following stems appear silent (RMS<{RMS_SILENCE_THRESHOLD}): {', '.join(silent_stems)}")
 
-    # Build ffmpeg command to collapse stereo stems -> mono and join into multichannel stream
-    command = ['ffmpeg', '-y']
-    filter_parts = []
-    join_inputs = []
-
-    for idx, (stem_name, stem_path) in enumerate(stems):
-        command.extend(['-i', stem_path])
-        mono_label = f'm{idx}'
-        info = stem_infos[stem_name]
-        if info.channels == 1:
-            filter_parts.append(f'[{idx}:a]aresample=async=1[{mono_label}]')
-        else:
-            filter_parts.append(f'[{idx}:a]pan=mono|c0=0.5*c0+0.5*c1,aresample=async=1[{mono_label}]')
-        join_inputs.append(f'[{mono_label}]')
-
-    filter_parts.append(f"{''.join(join_inputs)}join=inputs={len(stems)}:channel_layout={layout}[aout]")
-    filter_complex = ';'.join(filter_parts)
-
-    command.extend([
-        '-filter_complex', filter_complex,
-        '-map', '[aout]',
-        '-c:a', 'pcm_s24le',
-        multichannel_path
-    ])
+    await asyncio.to_thread(_write_multichannel, multichannel_path, stems, stem_infos)
 
-    await run_command(command, task_id, "Building multichannel stem")
-
-    # Verify channel layout metadata exists
-    probe_output = await run_command([
-        'ffprobe', '-v', 'error', '-select_streams', 'a:0',
-        '-show_entries', 'stream=channels,channel_layout', '-of', 'json',
-        multichannel_path
-    ], task_id, "Verifying multichannel layout")
-
-    try:
-        probe_data = json.loads(probe_output)
-        stream_info = probe_data['streams'][0]
-        channel_layout = stream_info.get('channel_layout')
-        channels = stream_info.get('channels')
-    except (KeyError, IndexError, json.JSONDecodeError) as exc:
-        raise RuntimeError(f"Unable to parse ffprobe output for {multichannel_path}: {exc}")
-
-    if not channel_layout or channel_layout.lower() == 'unknown':
-        raise RuntimeError("Multichannel WAV is missing a valid channel layout")
+    # Verify the written file carries one channel per stem; the layout is known from the stem count
+    channels = sf.info(multichannel_path).channels
+    channel_layout = layout
 
     if channels != len(stems):
         raise RuntimeError(f"Expected {len(stems)} channels but found {channels}")
 
-    index_path = os.path.join(separated_dir, STEM_INDEX_FILENAME)
     with open(index_path, 'w', encoding='utf-8') as index_file:
         json.dump({
             'order': stem_order,
             'channel_layout': channel_layout,
-            'channel_count': channels
+            'channel_count': channels,
+            'samplerate': stem_infos[stems[0][0]].samplerate,
+            'frames': max(info.frames for info in stem_infos.values()),
         }, index_file, indent=2)
 
+    _remember_multichannel(memo_key, multichannel_path, stem_order, channel_layout)
     return multichannel_path, stem_order, channel_layout
 
 
+def _demucs_device() -> str:
+    import torch
+    return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+
+def _get_demucs_model(name: str):
+    """Load a Demucs model once per process and keep it resident on the target device."""
+    with _demucs_lock:
+        model = demucs_models.get(name)
+        if model is None:
+            from demucs.pretrained import get_model
+            model = get_model(name)
+            model.to(_demucs_device())
+            model.eval()
+            demucs_models[name] = model
+        return model
+
+
+async def _preload_demucs_model():
+    """Warm the default Demucs model so the first separation skips loading it."""
+    try:
+        await asyncio.to_thread(_get_demucs_model, DEFAULT_DEMUCS_MODEL)
+    except Exception as exc:
+        # The first /separate reports the failure to the user instead
+        logger.warning("Could not preload Demucs model %s: %s", DEFAULT_DEMUCS_MODEL, exc)
+
+
+def _separate_in_process(model_name: str, input_path: str, output_dir: str):
+    """Run Demucs on input_path and write one <stem>.wav per source into output_dir."""
+    import torch
+    from demucs.apply import apply_model
+    from demucs.audio import AudioFile, save_audio
+
+    model = _get_demucs_model(model_name)
+    wav = AudioFile(input_path).read(streams=0, samplerate=model.samplerate, channels=model.audio_channels)
+
+    # Same input normalisation as demucs.separate
+    ref = wav.mean(0)
+    mean = ref.mean()
+    std = ref.std() + 1e-8
+    with torch.no_grad():
+        sources = apply_model(model, ((wav - mean) / std)[None], device=_demucs_device(), progress=False)[0]
+    sources = sources * std + mean
+
+    os.makedirs(output_dir, exist_ok=True)
+    for source, stem_name in zip(sources, model.sources):
+        save_audio(source, os.path.join(output_dir, f"{stem_name}.wav"), samplerate=model.samplerate)
+
+
+def _download_sync(url: str, ydl_opts: dict) -> str:
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+        # After a remux the file on disk has a different extension than the template
+        downloads = info.get('requested_downloads') or []
+        if downloads and downloads[-1].get('filepath'):
+            return downloads[-1]['filepath']
+        return ydl.prepare_filename(info)
+
+
 async def do_download(task_id: str, url: str):
     """Downloads the best quality mp4 video from a YouTube URL."""
-    tasks[task_id] = {"status": "in_progress", "progress": 0.0, "message": "Starting download..."}
+    tasks.set(task_id, {"status": "in_progress", "progress": 0.0, "message": "Starting download..."})
     try:
-        ydl_opts = {
-            'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-            'outtmpl': os.path.join(DOWNLOADS_DIR, '%(title)s.%(ext)s'),
-            'merge_output_format': 'mp4',
-            'progress_hooks': [lambda d: update_download_progress(task_id, d)],
-            'postprocessors': [{
-                'key': 'FFmpegVideoConvertor',
-                'preferedformat': 'mp4',
-            }],
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            filepath = ydl.prepare_filename(info)
-            tasks[task_id] = {"status": "completed", "progress": 1.0, "message": "Download complete.", "result": {"video_path": filepath}}
+        ydl_opts = {**YDL_BASE_OPTS, 'progress_hooks': [lambda d: update_download_progress(task_id, d)]}
+        # yt-dlp is synchronous, so it runs on a worker thread
+        async with download_slots:
+            filepath = await asyncio.to_thread(_download_sync, url, ydl_opts)
+        tasks.set(task_id, {"status": "completed", "progress": 1.0, "message": "Download complete.", "result": {"video_path": filepath}})
     except Exception as e:
-        tasks[task_id] = {"status": "failed", "message": f"Download failed: {e}"}
+        tasks.set(task_id, {"status": "failed", "message": f"Download failed: {e}"})
+    finally:
+        _progress_last_update.pop(task_id, None)
 
 def update_download_progress(task_id, d):
     if d['status'] == 'downloading':
+        # yt-dlp calls this per chunk; pollers only need a few updates a second
+        now = time.monotonic()
+        if now - _progress_last_update.get(task_id, 0.0) < PROGRESS_UPDATE_INTERVAL:
+            return
+        _progress_last_update[task_id] = now
         total_bytes = d.get('total_bytes') or d.get('total_bytes_estimate')
         if total_bytes:
             downloaded_bytes = d.get('downloaded_bytes', 0)
             progress = downloaded_bytes / total_bytes
-            tasks[task_id].update({"progress": progress, "message": f"Downloading: {d['_percent_str']} at {d['_speed_str']}"})
+            tasks.update(task_id, {"progress": progress, "message": f"Downloading: {d['_percent_str']} at {d['_speed_str']}"})
     elif d['status'] == 'finished':
-        tasks[task_id].update({"progress": 1.0, "message": "Post-processing download..."})
+        _progress_last_update.pop(task_id, None)
+        tasks.update(task_id, {"progress": 1.0, "message": "Post-processing download..."})
 
 
 async def do_separate(task_id: str, video_path: str, model: str):
     """Separates an audio or video file into stems using Demucs."""
-    tasks[task_id] = {"status": "in_progress", "progress": 0.0, "message": "Starting separation..."}
+    tasks.set(task_id, {"status": "in_progress", "progress": 0.0, "message": "Starting separation..."})
     try:
         # Create a unique output directory for this separation task
         output_base_name = os.path.splitext(os.path.basename(video_path))[0]
         unique_output_dir = os.path.join(SEPARATED_DIR, f"{output_base_name}_{uuid.uuid4().hex}")
         os.makedirs(unique_output_dir, exist_ok=True)
 
-        command = [
-            "python3", "-m", "demucs.separate",
-            "-n", model,
-            "-o", unique_output_dir,
-            "--filename", "{stem}.{ext}", # Output stems directly in the unique_output_dir
-            video_path
-        ]
-        
-        # Demucs output is verbose, we'll just capture it and update status based on completion
-        process = await asyncio.create_subprocess_exec(
-            *command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
-
-        if process.returncode != 0:
-            tasks[task_id] = {"status": "failed", "message": f"Separation failed: {stderr.decode().strip()}"}
-            raise RuntimeError(f"Demucs separation failed: {stderr.decode().strip()}")
-
-        # Demucs creates a subdirectory inside unique_output_dir with the track name
-        # We need to find that directory
-        demucs_output_dirs = [d for d in os.listdir(unique_output_dir) if os.path.isdir(os.path.join(unique_output_dir, d))]
-        if not demucs_output_dirs:
-            raise RuntimeError("Demucs did not create an output directory.")
-        
-        actual_separated_path = os.path.join(unique_output_dir, demucs_output_dirs[0])
+        # Mirror the demucs CLI layout (<out>/<model>/<stem>.wav) so existing lookups keep working
+        actual_separated_path = os.path.join(unique_output_dir, model)
+        async with separation_slots:
+            await asyncio.to_thread(_separate_in_process, model, video_path, actual_separated_path)
 
         # Auto-trigger remuxing after successful separation
-        tasks[task_id] = {"status": "in_progress", "progress": 0.9, "message": "Separation complete. Starting auto-remux..."}
+        tasks.set(task_id, {"status": "in_progress", "progress": 0.9, "message": "Separation complete. Starting auto-remux..."})
 
         # Find the original video path to pass to remux
         # video_path is the input parameter to this function
         remux_result = await do_auto_remux(task_id, video_path, actual_separated_path)
 
-        tasks[task_id] = {"status": "completed", "progress": 1.0, "message": "Separation and remux complete.",
-                         "result": {"separated_dir": actual_separated_path, "model": model, **remux_result}}
+        tasks.set(task_id, {"status": "completed", "progress": 1.0, "message": "Separation and remux complete.",
+                         "result": {"separated_dir": actual_separated_path, "model": model, **remux_result}})
     except Exception as e:
-        tasks[task_id] = {"status": "failed", "message": f"Separation failed: {e}"}
+        tasks.set(task_id, {"status": "failed", "message": f"Separation failed: {e}"})
 
 async def do_merge_stems(task_id: str, separated_dir: str):
     """Merges separated stems into a single multichannel WAV file."""
-    tasks[task_id] = {"status": "in_progress", "progress": 0.0, "message": "Merging stems..."}
+    tasks.set(task_id, {"status": "in_progress", "progress": 0.0, "message": "Merging stems..."})
     try:
-        multichannel_path, stem_order, channel_layout = await ensure_multichannel_stem(task_id, separated_dir)
-        tasks[task_id] = {
+        async with mix_slots:
+            multichannel_path, stem_order, channel_layout = await ensure_multichannel_stem(task_id, separated_dir)
+        tasks.set(task_id, {
             "status": "completed",
             "progress": 1.0,
             "message": "Stems merged successfully.",
@@ -301,38 +773,50 @@ async def do_merge_stems(task_id: str, separated_dir: str):
                 "stem_order": stem_order,
                 "channel_layout": channel_layout
             }
-        }
+        })
     except Exception as e:
-        tasks[task_id] = {"status": "failed", "message": f"Stem merging failed: {e}"}
+        tasks.set(task_id, {"status": "failed", "message": f"Stem merging failed: {e}"})
 
 async def do_auto_remux(task_id: str, video_path: str, separated_dir: str):
     """Automatically remuxes video with all separated stems as multi-track audio."""
-    tasks[task_id] = {"status": "in_progress", "progress": 0.0, "message": "Auto-remuxing video with stems..."}
+    tasks.set(task_id, {"status": "in_progress", "progress": 0.0, "message": "Auto-remuxing video with stems..."})
     try:
         # Get base name for output file
         output_base_name = os.path.splitext(os.path.basename(video_path))[0]
         output_filename = f"{output_base_name}_remuxed.mp4"
         output_filepath = os.path.join(REMUXED_DIR, output_filename)
 
-        multichannel_path, stem_order, channel_layout = await ensure_multichannel_stem(task_id, separated_dir)
+        async with mix_slots:
+            multichannel_path, stem_order, channel_layout = await ensure_multichannel_stem(task_id, separated_dir)
 
         command = [
             'ffmpeg', '-y',
             '-i', video_path,
+            # libsndfile writes no WAV channel mask, so ffmpeg would guess a layout
+            # (5.1 for six channels, turning the guitar stem into LFE). Take the
+            # channels untagged and assign the stem layout explicitly, in order.
+            '-guess_layout_max', '0',
             '-i', multichannel_path,
             '-map', '0:v:0',
             '-map', '1:a:0',
+            '-af', f'channelmap=channel_layout={channel_layout}',
             '-c:v', 'copy',
             '-c:a', 'aac',
             '-b:a', '384k',
+            '-threads', str(FFMPEG_THREADS),
             '-movflags', 'use_metadata_tags',
             '-metadata:s:a:0', f'title=Stem mix ({channel_layout})',
             output_filepath
         ]
 
-        await run_command(command, task_id, "Remuxing stems into MP4")
+        async with ffmpeg_slots:
+            await run_command(command, task_id, "Remuxing stems into MP4")
 
-        tasks[task_id] = {
+        remuxed_layout = await _probe_audio_layout(task_id, output_filepath)
+        if remuxed_layout != channel_layout:
+            raise RuntimeError(f"Expected channel layout {channel_layout} in {output_filepath} but found {remuxed_layout}")
+
+        tasks.set(task_id, {
             "status": "completed",
             "progress": 1.0,
             "message": "Auto-remux complete.",
@@ -343,95 +827,87 @@ async def do_auto_remux(task_id: str, video_path: str, separated_dir: str):
                 "channel_layout": channel_layout,
                 "multichannel_wav_path": multichannel_path
             }
-        }
+        })
 
-    except ffmpeg.Error as e:
-        tasks[task_id] = {"status": "failed", "message": f"FFmpeg error during auto-remux: {e.stderr.decode().strip()}"}
     except Exception as e:
-        tasks[task_id] = {"status": "failed", "message": f"Auto-remux failed: {e}"}
+        tasks.set(task_id, {"status": "failed", "message": f"Auto-remux failed: {e}"})
 
 
 async def do_mix_export(task_id: str, video_path: str, multichannel_wav_path: str, gains: dict, output_filename: str):
     """Applies gains to stems and remuxes with video."""
-    tasks[task_id] = {"status": "in_progress", "progress": 0.0, "message": "Starting mix export..."}
+    tasks.set(task_id, {"status": "in_progress", "progress": 0.0, "message": "Starting mix export..."})
     try:
+        # The mix reads the individual stems, so the multichannel WAV is not rebuilt here
         separated_dir = os.path.dirname(multichannel_wav_path)
-        multichannel_wav_path, _, _ = await ensure_multichannel_stem(task_id, separated_dir)
         index_path = os.path.join(separated_dir, STEM_INDEX_FILENAME)
 
-        stem_order = None
-        if os.path.exists(index_path):
-            with open(index_path, 'r', encoding='utf-8') as index_file:
-                stem_order = json.load(index_file).get('order')
-
-        if not stem_order:
-            stem_order = [stem for stem, _ in _discover_stems(separated_dir)]
-
-        if not stem_order:
+        # One directory scan yields the stems in the same order the index records
+        stem_paths = _discover_stems(separated_dir)
+        if not stem_paths:
             raise ValueError("No stems available for mix export.")
 
-        stem_infos = []
-        for stem_name in stem_order:
-            stem_path = os.path.join(separated_dir, f"{stem_name}.wav")
-            if not os.path.exists(stem_path):
-                continue
-            info = sf.info(stem_path)
-            stem_infos.append((stem_name, stem_path, info))
-
-        if not stem_infos:
-            raise ValueError("Stem files referenced in index are missing.")
-
-        samplerate = stem_infos[0][2].samplerate
-        channels = stem_infos[0][2].channels
-        max_frames = max(info.frames for _, _, info in stem_infos)
-
-        mixed_buffer = np.zeros((max_frames, channels), dtype='float32')
-
-        for stem_name, stem_path, info in stem_infos:
-            if info.samplerate != samplerate or info.channels != channels:
-                raise ValueError(f"Sample rate/channel mismatch for stem {stem_name}")
-
-            gain = gains.get(stem_name, 1.0)
-            if gain == 0.0:
-                continue
-
-            with sf.SoundFile(stem_path) as stem_file:
-                frame_cursor = 0
-                while True:
-                    block = stem_file.read(frames=65536, dtype='float32')
-                    if block.size == 0:
-                        break
-                    if block.ndim == 1:
-                        block = np.expand_dims(block, axis=1)
-                    block_len = block.shape[0]
-                    mixed_buffer[frame_cursor:frame_cursor + block_len] += block * gain
-                    frame_cursor += block_len
-
-        # Normalize to prevent clipping
-        peak = np.max(np.abs(mixed_buffer))
-        if peak > 1.0:
-            mixed_buffer /= peak
-
-        temp_mixed_audio_path = os.path.join(MIXES_DIR, f"temp_mixed_audio_{uuid.uuid4().hex}.wav")
-        sf.write(temp_mixed_audio_path, mixed_buffer, samplerate)
+        # An index newer than every stem already knows their common sample rate,
+        # so the stems' WAV headers need not be parsed again
+        index = _load_fresh_index(multichannel_wav_path, index_path, stem_paths)
+        known_samplerate = index.get('samplerate') if index is not None else None
 
         output_filepath = os.path.join(MIXES_DIR, output_filename)
 
-        # Use ffmpeg to remux video with the new audio
-        # Input video stream, input audio stream, copy video, map audio, output
-        (ffmpeg
-            .input(video_path)
-            .output(ffmpeg.input(temp_mixed_audio_path).audio, output_filepath, vcodec='copy', acodec='aac', strict='experimental')
-            .overwrite_output()
-            .run(capture_stdout=True, capture_stderr=True))
-
-        os.remove(temp_mixed_audio_path) # Clean up temporary audio file
-
-        tasks[task_id] = {"status": "completed", "progress": 1.0, "message": "Mix export complete.", "result": {"output_path": output_filepath}}
-    except ffmpeg.Error as e:
-        tasks[task_id] = {"status": "failed", "message": f"FFmpeg error during mix export: {e.stderr.decode().strip()}"}
+        async with mix_slots:
+            # Decode (or map the cached decode of) every stem concurrently
+            loaded = await asyncio.gather(*[
+                asyncio.to_thread(_load_stem_samples, stem_path, known_samplerate) for _, stem_path in stem_paths
+            ])
+
+            samplerate = loaded[0][1]
+            channels = loaded[0][0].shape[1]
+            max_frames = max(samples.shape[0] for samples, _ in loaded)
+
+            sources = []
+            stem_gains = []
+            for (stem_name, _), (samples, stem_samplerate) in zip(stem_paths, loaded):
+                if stem_samplerate != samplerate or samples.shape[1] != channels:
+                    raise ValueError(f"Sample rate/channel mismatch for stem {stem_name}")
+
+                gain = gains.get(stem_name, 1.0)
+                if gain == 0.0:
+                    continue
+                sources.append(samples)
+                stem_gains.append(gain)
+            stem_gains = np.array(stem_gains, dtype=np.float32)
+
+            # The peak must be known before the first sample reaches ffmpeg, so a
+            # mix pass whose kernel also reduces the peak finds it; normalisation then
+            # folds into the gains.
+            peak = await asyncio.to_thread(_mix_peak, sources, stem_gains, channels, max_frames)
+            if peak > 1.0:
+                stem_gains /= peak
+
+            # Stream raw float32 PCM into ffmpeg's stdin instead of a temporary WAV
+            command = [
+                'ffmpeg', '-y',
+                '-i', video_path,
+                '-f', 'f32le', '-ar', str(samplerate), '-ac', str(channels),
+                '-i', 'pipe:0',
+                '-map', '0:v',
+                '-map', '1:a',
+                '-c:v', 'copy',
+                '-c:a', 'aac',
+                '-strict', 'experimental',
+                '-threads', str(FFMPEG_THREADS),
+                output_filepath
+            ]
+            async with ffmpeg_slots:
+                await run_command_with_input(
+                    command,
+                    _iter_mixed_chunks(sources, stem_gains, channels, max_frames),
+                    task_id,
+                    "Remuxing mixed audio into MP4"
+                )
+
+        tasks.set(task_id, {"status": "completed", "progress": 1.0, "message": "Mix export complete.", "result": {"output_path": output_filepath}})
     except Exception as e:
-        tasks[task_id] = {"status": "failed", "message": f"Mix export failed: {e}"}
+        tasks.set(task_id, {"status": "failed", "message": f"Mix export failed: {e}"})
 
 
 # --- API Endpoints ---
@@ -471,70 +947,87 @@ async def get_task_progress(task_id: str):
         raise HTTPException(status_code=404, detail="Task not found.")
     return ProgressResponse(task_id=task_id, **task_info)
 
+def _remuxed_file_metadata(entry: os.DirEntry, separated_entries: List[str]) -> dict:
+    """Collect size and stem metadata for a single remuxed MP4."""
+    filename = entry.name
+    file_size = entry.stat().st_size
+
+    # Extract base name (remove _remuxed.mp4)
+    base_name = filename.replace('_remuxed.mp4', '')
+
+    # Find matching separated directory
+    separated_dir = None
+    stem_metadata = None
+    for sep_dir in separated_entries:
+        if sep_dir.startswith(base_name + '_'):
+            # Found matching directory, look for htdemucs_6s subdirectory
+            potential_path = os.path.join(SEPARATED_DIR, sep_dir)
+            htdemucs_path = os.path.join(potential_path, 'htdemucs_6s')
+            if os.path.exists(htdemucs_path):
+                separated_dir = htdemucs_path
+                index_path = os.path.join(htdemucs_path, STEM_INDEX_FILENAME)
+                if os.path.exists(index_path):
+                    with open(index_path, 'r', encoding='utf-8') as index_file:
+                        stem_metadata = json.load(index_file)
+                break
+
+    return {
+        "filename": filename,
+        "path": os.path.join(REMUXED_DIR, filename),
+        "size_mb": round(file_size / (1024 * 1024), 2),
+        "separated_dir": separated_dir,
+        "stem_order": stem_metadata.get('order') if stem_metadata else None,
+        "channel_layout": stem_metadata.get('channel_layout') if stem_metadata else None
+    }
+
+
+def _scan_dir(directory: str) -> List[os.DirEntry]:
+    if not os.path.exists(directory):
+        return []
+    with os.scandir(directory) as it:
+        return list(it)
+
+
 @app.get("/list-remuxed")
 async def list_remuxed_files():
     """List all remuxed files in the remuxed directory with their separated directories."""
-    remuxed_files = []
-    if os.path.exists(REMUXED_DIR):
-        for filename in os.listdir(REMUXED_DIR):
-            if filename.endswith('.mp4'):
-                filepath = os.path.join(REMUXED_DIR, filename)
-                file_size = os.path.getsize(filepath)
-
-                # Extract base name (remove _remuxed.mp4)
-                base_name = filename.replace('_remuxed.mp4', '')
-
-                # Find matching separated directory
-                separated_dir = None
-                stem_metadata = None
-                if os.path.exists(SEPARATED_DIR):
-                    for sep_dir in os.listdir(SEPARATED_DIR):
-                        if sep_dir.startswith(base_name + '_'):
-                            # Found matching directory, look for htdemucs_6s subdirectory
-                            potential_path = os.path.join(SEPARATED_DIR, sep_dir)
-                            htdemucs_path = os.path.join(potential_path, 'htdemucs_6s')
-                            if os.path.exists(htdemucs_path):
-                                separated_dir = htdemucs_path
-                                index_path = os.path.join(htdemucs_path, STEM_INDEX_FILENAME)
-                                if os.path.exists(index_path):
-                                    with open(index_path, 'r', encoding='utf-8') as index_file:
-                                        stem_metadata = json.load(index_file)
-                                break
-
-                remuxed_files.append({
-                    "filename": filename,
-                    "path": filepath,
-                    "size_mb": round(file_size / (1024 * 1024), 2),
-                    "separated_dir": separated_dir,
-                    "stem_order": stem_metadata.get('order') if stem_metadata else None,
-                    "channel_layout": stem_metadata.get('channel_layout') if stem_metadata else None
-                })
-    return {"files": remuxed_files}
+    remuxed_entries, separated_entries = await asyncio.gather(
+        asyncio.to_thread(_scan_dir, REMUXED_DIR),
+        asyncio.to_thread(_scan_dir, SEPARATED_DIR),
+    )
+    separated_names = [entry.name for entry in separated_entries]
+
+    # Gather per-file metadata off the event loop
+    remuxed_files = await asyncio.gather(*[
+        asyncio.to_thread(_remuxed_file_metadata, entry, separated_names)
+        for entry in remuxed_entries if entry.name.endswith('.mp4')
+    ])
+    return {"files": list(remuxed_files)}
 
 @app.get("/files/{filename:path}")
 async def serve_file(filename: str):
-    """Serve static files from downloads, separated, and mixes directories."""
-    # Basic security: ensure file is within allowed directories
-    # First try the path as-is (it might already be relative to project root)
-    if os.path.exists(filename) and os.path.isfile(filename):
-        return FileResponse(filename)
-
-    # Then try prepending each base directory
-    for base_dir in [DOWNLOADS_DIR, SEPARATED_DIR, MIXES_DIR]:
-        file_path = os.path.join(base_dir, filename)
-        if os.path.exists(file_path) and os.path.isfile(file_path):
+    """Serve static files from the downloads, separated, mixes, and remuxed directories."""
+    # Try the path as-is (it might already be relative to project root), then under
+    # each data directory. Symlinks and ".." are resolved before the whitelist check.
+    for candidate in (filename, *(os.path.join(root, filename) for root in SERVED_ROOTS)):
+        file_path = os.path.realpath(candidate)
+        if file_path.startswith(SERVED_ROOTS) and os.path.isfile(file_path):
+            # FileResponse streams via sendfile and answers Range requests for seeking
             return FileResponse(file_path)
     raise HTTPException(status_code=404, detail="File not found.")
 
 
 # --- Cleanup Endpoint (Optional, for development/testing) ---
+def _reset_dir(directory: str):
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory, exist_ok=True)
+
+
 @app.post("/cleanup")
 async def cleanup_files():
-    """Removes all downloaded, separated, and mixed files."""
-    for directory in [DOWNLOADS_DIR, SEPARATED_DIR, MIXES_DIR]:
-        if os.path.exists(directory):
-            shutil.rmtree(directory)
-            os.makedirs(directory)
+    """Removes all downloaded, separated, mixed, and remuxed files."""
+    await asyncio.gather(*[asyncio.to_thread(_reset_dir, directory) for directory in DATA_DIRS])
     tasks.clear()
     return {"message": "All temporary files and task data cleaned up."}
 